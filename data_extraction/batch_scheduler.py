@@ -0,0 +1,361 @@
+import os
+import json
+import time
+import signal
+import shutil
+import fnmatch
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+from data_extraction.output_writer import output_writer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_INCLUDE = ["*"]
+DEFAULT_EXCLUDE = [".*", "~$*"]
+DEFAULT_TIMEOUT = 30 * 60  # seconds per file
+DEFAULT_MEMORY_LIMIT = 4 * 1024 ** 3  # bytes per file
+JOURNAL_FILENAME = ".progress.jsonl"
+
+# How often running workers are checked against their limits (seconds)
+POLL_INTERVAL = 1.0
+# How long a stopped worker gets to exit after SIGTERM before it is killed (seconds)
+STOP_GRACE_PERIOD = 5.0
+
+
+def _matches(rel_path, patterns):
+    """
+    Check a relative path (or its file name) against a list of glob patterns.
+    """
+    name = os.path.basename(rel_path)
+    return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def discover_files(input_folder, include=None, exclude=None, output_folder=None):
+    """
+    Recursively find input files, ordered largest first.
+
+    Args:
+        input_folder (str): Folder to search.
+        include (list): Glob patterns a file must match.
+        exclude (list): Glob patterns that skip a file or folder, added to DEFAULT_EXCLUDE.
+        output_folder (str): Output folder to skip if it lies inside the input folder.
+
+    Returns:
+        list: Dictionaries with the path, relative path, size and mtime of each file.
+    """
+    include = include or DEFAULT_INCLUDE
+    exclude = DEFAULT_EXCLUDE + (exclude or [])
+    output_realpath = os.path.realpath(output_folder) if output_folder else None
+    jobs = []
+    for root, dirs, files in os.walk(input_folder):
+        rel_root = os.path.relpath(root, input_folder)
+        dirs[:] = sorted(
+            d for d in dirs
+            if not _matches(os.path.normpath(os.path.join(rel_root, d)), exclude)
+            and os.path.realpath(os.path.join(root, d)) != output_realpath
+        )
+        for file_name in files:
+            rel_path = os.path.normpath(os.path.join(rel_root, file_name))
+            if not _matches(rel_path, include) or _matches(rel_path, exclude):
+                continue
+            path = os.path.join(root, file_name)
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                logging.warning(f"Skipping unreadable file {path}: {e}")
+                continue
+            jobs.append({
+                "path": path,
+                "rel_path": rel_path,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime
+            })
+
+    # Largest files first, so the longest jobs do not start last and stretch the tail
+    jobs.sort(key=lambda job: job["size"], reverse=True)
+    return jobs
+
+
+def _available_memory():
+    """
+    Return the available system memory in bytes, or None if it cannot be read.
+    """
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _process_memory(pid):
+    """
+    Return the resident memory of a process in bytes, or None if it cannot be read.
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ProgressJournal:
+    """
+    Append-only record of finished files, used to resume an interrupted batch.
+    """
+
+    def __init__(self, journal_path):
+        """
+        Initialize the journal and load entries from a previous run.
+        """
+        self.journal_path = journal_path
+        self.entries = {}
+        if os.path.exists(journal_path):
+            with open(journal_path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Ignore a line cut short by a crash
+                    self.entries[entry["rel_path"]] = entry
+
+    def is_done(self, job):
+        """
+        Check whether a file was completed by a previous run and is unchanged since.
+        """
+        entry = self.entries.get(job["rel_path"])
+        return (entry is not None and entry["status"] == "done"
+                and entry["size"] == job["size"] and entry["mtime"] == job["mtime"])
+
+    def record(self, job, status, elapsed=None):
+        """
+        Append the outcome of a file to the journal.
+        """
+        entry = {
+            "rel_path": job["rel_path"],
+            "size": job["size"],
+            "mtime": job["mtime"],
+            "status": status,
+            "elapsed": round(elapsed, 2) if elapsed is not None else None
+        }
+        with open(self.journal_path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.entries[job["rel_path"]] = entry
+
+
+def _side_folder(output_folder, suffix):
+    """
+    Return the hidden sibling folder used to stage or replace a document's outputs.
+    """
+    parent, name = os.path.split(os.path.normpath(output_folder))
+    return os.path.join(parent, f".{name}.{suffix}")
+
+
+def _reset_staging(output_folder):
+    """
+    Remove leftovers of an interrupted job before it starts or after it is stopped.
+
+    If a previous run crashed while swapping folders, the old outputs are moved back.
+    """
+    previous = _side_folder(output_folder, "old")
+    if os.path.exists(previous):
+        if os.path.exists(output_folder):
+            shutil.rmtree(previous, ignore_errors=True)
+        else:
+            os.replace(previous, output_folder)
+    shutil.rmtree(_side_folder(output_folder, "partial"), ignore_errors=True)
+
+
+def _publish(staging_folder, output_folder):
+    """
+    Move a finished staging folder into place, replacing earlier outputs.
+    """
+    previous = _side_folder(output_folder, "old")
+    os.makedirs(staging_folder, exist_ok=True)
+    if os.path.exists(output_folder):
+        os.replace(output_folder, previous)
+    os.replace(staging_folder, output_folder)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def _run_job(process_fn, input_path, output_folder):
+    """
+    Worker process entry point.
+
+    Outputs are written to a staging folder and only moved to output_folder once
+    every write has reached disk, so a document's folder is never half-filled.
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()  # Own process group, so helper processes are stopped with the worker
+    staging_folder = _side_folder(output_folder, "partial")
+    process_fn(input_path, staging_folder)
+    output_writer.flush()
+    _publish(staging_folder, output_folder)
+
+
+def _signal_group(process, sig):
+    """
+    Send a signal to a worker's process group. Returns False if there is no such group.
+    """
+    if not hasattr(os, "killpg"):
+        return False
+    try:
+        os.killpg(process.pid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+def _stop_process(process):
+    """
+    Stop a worker and any processes it started, without waiting on it indefinitely.
+    """
+    if not _signal_group(process, signal.SIGTERM):
+        process.terminate()
+    process.join(STOP_GRACE_PERIOD)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    # Helpers that outlived the worker are still in its process group
+    _signal_group(process, signal.SIGKILL)
+
+
+class BatchScheduler:
+    """
+    Run a processing function over a folder of documents, one worker process per file.
+
+    Each worker is stopped if it exceeds the per-file time or memory limit, so
+    a single corrupt or oversized file cannot hang the batch. Outputs of failed
+    or stopped workers are discarded, leaving earlier outputs in place.
+    """
+
+    def __init__(self, process_fn, timeout=DEFAULT_TIMEOUT, memory_limit=DEFAULT_MEMORY_LIMIT,
+                 max_workers=None, resume=True):
+        """
+        Initialize the scheduler.
+
+        Args:
+            process_fn (callable): Function called as process_fn(input_path, output_folder).
+            timeout (float): Maximum seconds allowed per file.
+            memory_limit (int): Maximum resident memory in bytes allowed per file.
+            max_workers (int): Upper bound on concurrent files; defaults to the CPU count.
+            resume (bool): Skip files recorded as done by a previous run.
+        """
+        self.process_fn = process_fn
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.resume = resume
+        self._memory_warned = False
+
+    def _can_start(self, running):
+        """
+        Decide whether another worker fits within the worker count and available RAM.
+
+        Each running worker reserves the part of memory_limit it has not used yet,
+        since what it already uses is no longer counted as available.
+        """
+        if len(running) >= self.max_workers:
+            return False
+        if not running:
+            return True  # Always make progress, even on a low-memory machine
+        available = _available_memory()
+        if available is None:
+            return True
+        reserved = 0
+        for process, _, _, _ in running.values():
+            rss = _process_memory(process.pid) or 0
+            reserved += max(self.memory_limit - rss, 0)
+        return available - reserved >= self.memory_limit
+
+    def _check_limits(self, process, started):
+        """
+        Return the reason a running worker must be stopped, or None.
+        """
+        if time.monotonic() - started > self.timeout:
+            return "timeout"
+        rss = _process_memory(process.pid)
+        if rss is None:
+            if not self._memory_warned:
+                logging.warning("Cannot measure worker memory on this platform; the per-file memory limit is not enforced.")
+                self._memory_warned = True
+        elif rss > self.memory_limit:
+            return "memory"
+        return None
+
+    def run(self, jobs, output_folder):
+        """
+        Process the given jobs and record each outcome in the progress journal.
+
+        Args:
+            jobs (list): Jobs as returned by discover_files.
+            output_folder (str): Root folder for outputs and the progress journal.
+
+        Returns:
+            dict: Mapping of relative path to final status.
+        """
+        journal = ProgressJournal(os.path.join(output_folder, JOURNAL_FILENAME))
+        pending = list(jobs)
+        if self.resume:
+            skipped = [job for job in pending if journal.is_done(job)]
+            if skipped:
+                logging.info(f"Resuming: skipping {len(skipped)} file(s) completed in a previous run.")
+            pending = [job for job in pending if not journal.is_done(job)]
+        pending.reverse()  # Pop from the end, keeping largest-first order
+
+        results = {}
+        running = {}
+        try:
+            while pending or running:
+                while pending and self._can_start(running):
+                    job = pending.pop()
+                    job_output = os.path.join(output_folder, os.path.splitext(job["rel_path"])[0])
+                    _reset_staging(job_output)
+                    process = multiprocessing.Process(
+                        target=_run_job,
+                        args=(self.process_fn, job["path"], job_output),
+                        name=f"extract-{job['rel_path']}"
+                    )
+                    process.start()
+                    running[process.sentinel] = (process, job, job_output, time.monotonic())
+                    logging.info(f"Started {job['rel_path']} ({job['size']} bytes)")
+
+                for sentinel in wait(list(running), timeout=POLL_INTERVAL):
+                    process, job, job_output, started = running.pop(sentinel)
+                    process.join()
+                    status = "done" if process.exitcode == 0 else "failed"
+                    if status == "failed":
+                        logging.error(f"Processing failed for {job['rel_path']} (exit code {process.exitcode})")
+                        _reset_staging(job_output)
+                    journal.record(job, status, time.monotonic() - started)
+                    results[job["rel_path"]] = status
+
+                for sentinel, (process, job, job_output, started) in list(running.items()):
+                    if not process.is_alive():
+                        continue  # Exited since wait() returned; reaped on the next pass
+                    reason = self._check_limits(process, started)
+                    if reason is None:
+                        continue
+                    logging.error(f"Stopping {job['rel_path']}: exceeded {reason} limit")
+                    _stop_process(process)
+                    _reset_staging(job_output)
+                    del running[sentinel]
+                    journal.record(job, reason, time.monotonic() - started)
+                    results[job["rel_path"]] = reason
+        finally:
+            # Workers run in their own process groups and do not receive Ctrl+C, so stop them here
+            for process, job, job_output, _ in running.values():
+                logging.warning(f"Stopping {job['rel_path']}: batch interrupted")
+                _stop_process(process)
+                _reset_staging(job_output)
+
+        return results
@@ -1,12 +1,23 @@
 import os
+import re
 import fitz  # PyMuPDF
 import zipfile
 import logging
+import xml.etree.ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor
+from data_extraction.output_writer import output_writer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Number of nearest text blocks (PDF) or neighbouring paragraphs (DOCX) used as image context
+CONTEXT_BLOCKS = 3
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DRAWING_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
 def extract_images_from_pdf(pdf_path, output_folder):
     image_paths = []
     try:
@@ -22,8 +33,7 @@ def extract_images_from_pdf(pdf_path, output_folder):
                     image_ext = base_image["ext"]
                     image_filename = f"image_page{page_index+1}_{img_index+1}.{image_ext}"
                     image_path = os.path.join(output_folder, image_filename)
-                    with open(image_path, "wb") as image_file:
-                        image_file.write(image_bytes)
+                    output_writer.write_bytes(image_path, image_bytes)
                     image_paths.append(image_path)
                     logging.info(f"Extracted image: {image_path}")
     except Exception as e:
@@ -40,8 +50,7 @@ def extract_images_from_docx(docx_path, output_folder):
                     image_data = docx_zip.read(file_info)
                     image_filename = os.path.basename(file_info.filename)
                     image_path = os.path.join(output_folder, image_filename)
-                    with open(image_path, 'wb') as image_file:
-                        image_file.write(image_data)
+                    output_writer.write_bytes(image_path, image_data)
                     image_paths.append(image_path)
                     logging.info(f"Extracted image: {image_path}")
     except Exception as e:
@@ -57,6 +66,92 @@ def extract_images_from_file(file_path, output_folder):
         logging.warning("Unsupported file format for image extraction.")
         return []
 
+def _rect_distance(a, b):
+    """
+    Distance between two rectangles given as (x0, y0, x1, y1); zero if they overlap.
+    """
+    dx = max(a[0] - b[2], b[0] - a[2], 0)
+    dy = max(a[1] - b[3], b[1] - a[3], 0)
+    return (dx ** 2 + dy ** 2) ** 0.5
+
+def extract_image_contexts_from_pdf(pdf_path, image_paths):
+    """
+    Collect the text blocks nearest to each extracted PDF image.
+
+    Image positions are recovered from the page and index encoded in the
+    file names written by extract_images_from_pdf.
+    """
+    contexts = {}
+    try:
+        pdf_file = fitz.open(pdf_path)
+        for image_path in image_paths:
+            match = re.match(r"image_page(\d+)_(\d+)\.", os.path.basename(image_path))
+            if not match:
+                continue
+            page = pdf_file[int(match.group(1)) - 1]
+            image_list = page.get_images(full=True)
+            img_index = int(match.group(2)) - 1
+            if img_index >= len(image_list):
+                continue
+            rects = page.get_image_rects(image_list[img_index][0])
+            blocks = [b for b in page.get_text("blocks") if b[6] == 0 and b[4].strip()]
+            if rects and blocks:
+                rect = tuple(rects[0])
+                blocks.sort(key=lambda b: _rect_distance(rect, b[:4]))
+                contexts[image_path] = " ".join(b[4] for b in blocks[:CONTEXT_BLOCKS])
+            else:
+                contexts[image_path] = page.get_text()
+    except Exception as e:
+        logging.error(f"Error extracting image context from PDF: {e}")
+    return contexts
+
+def extract_image_contexts_from_docx(docx_path, image_paths):
+    """
+    Collect the paragraphs surrounding each image embedded in a DOCX file.
+    """
+    contexts = {}
+    paths_by_name = {os.path.basename(path): path for path in image_paths}
+    try:
+        with zipfile.ZipFile(docx_path, 'r') as docx_zip:
+            rels = ET.fromstring(docx_zip.read('word/_rels/document.xml.rels'))
+            targets = {rel.get('Id'): os.path.basename(rel.get('Target', '')) for rel in rels.iter(f"{PACKAGE_REL_NS}Relationship")}
+            document = ET.fromstring(docx_zip.read('word/document.xml'))
+
+        paragraphs = []
+        for paragraph in document.iter(f"{WORD_NS}p"):
+            text = "".join(t.text or "" for t in paragraph.iter(f"{WORD_NS}t"))
+            embeds = [blip.get(f"{REL_NS}embed") for blip in paragraph.iter(f"{DRAWING_NS}blip")]
+            paragraphs.append((text, embeds))
+
+        for index, (_, embeds) in enumerate(paragraphs):
+            for embed in embeds:
+                image_path = paths_by_name.get(targets.get(embed))
+                if image_path is None:
+                    continue
+                window = paragraphs[max(index - CONTEXT_BLOCKS, 0):index + CONTEXT_BLOCKS + 1]
+                contexts[image_path] = " ".join(text for text, _ in window if text.strip())
+    except Exception as e:
+        logging.error(f"Error extracting image context from DOCX: {e}")
+    return contexts
+
+def extract_image_contexts(file_path, image_paths):
+    """
+    Map each extracted image path to the document text that surrounds it.
+
+    Args:
+        file_path (str): Path to the source document.
+        image_paths (list): Image paths returned by extract_images_from_file.
+
+    Returns:
+        dict: Mapping of image path to nearby text.
+    """
+    if file_path.lower().endswith('.pdf'):
+        return extract_image_contexts_from_pdf(file_path, image_paths)
+    elif file_path.lower().endswith('.docx'):
+        return extract_image_contexts_from_docx(file_path, image_paths)
+    else:
+        return {}
+
 def extract_images_from_files(file_paths, output_folder):
     with ThreadPoolExecutor() as executor:
         futures = [executor.submit(extract_images_from_file, file_path, output_folder) for file_path in file_paths]
@@ -0,0 +1,146 @@
+import os
+import queue
+import atexit
+import logging
+import tempfile
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Maximum number of pending writes before producers wait for the disk to catch up
+DEFAULT_QUEUE_SIZE = 256
+
+_STOP = object()
+
+# mkstemp creates files as 0600; outputs get the usual umask-based mode instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+class OutputWriter:
+    """
+    Background writer shared by all extraction stages.
+
+    Compute threads hand finished outputs (as bytes) to the writer, which
+    writes them on a single background thread. Every file is written to a
+    temporary file in the destination folder and renamed into place, so a
+    crash never leaves a half-written file behind.
+    """
+
+    def __init__(self, max_queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Initialize the writer with a bounded queue of pending writes.
+        """
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._created_folders = set()
+        self._errors = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        """
+        Start the background thread on first use.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+                self._thread.start()
+
+    def _ensure_folder(self, folder):
+        """
+        Create the destination folder once; later writes to it skip the check.
+        """
+        if folder in self._created_folders:
+            return
+        os.makedirs(folder, exist_ok=True)
+        self._created_folders.add(folder)
+
+    def _write_atomic(self, path, data):
+        """
+        Write data to a temporary file next to path, then rename it into place.
+        """
+        folder = os.path.dirname(os.path.abspath(path))
+        self._ensure_folder(folder)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            os.chmod(tmp_path, FILE_MODE)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                path, data = item
+                try:
+                    self._write_atomic(path, data)
+                except Exception as e:
+                    logging.error(f"Error writing {path}: {e}")
+                    with self._lock:
+                        self._errors.append((path, e))
+            finally:
+                self._queue.task_done()
+
+    def write_bytes(self, path, data):
+        """
+        Queue bytes to be written atomically to path.
+
+        Args:
+            path (str): Destination file path.
+            data (bytes): File contents.
+        """
+        self._start()
+        self._queue.put((path, bytes(data)))
+
+    def write_text(self, path, text, encoding="utf-8"):
+        """
+        Queue text to be written atomically to path.
+
+        Args:
+            path (str): Destination file path.
+            text (str): File contents.
+            encoding (str): Text encoding.
+        """
+        self.write_bytes(path, text.encode(encoding))
+
+    def flush(self):
+        """
+        Block until every queued write has reached disk.
+
+        Raises:
+            OSError: If any write since the last flush failed.
+        """
+        if self._thread is not None:
+            self._queue.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            failed = ", ".join(path for path, _ in errors)
+            raise OSError(f"Failed to write {len(errors)} output file(s): {failed}")
+
+    def close(self):
+        """
+        Flush pending writes and stop the background thread.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+
+# Shared writer used by every stage
+output_writer = OutputWriter()
+atexit.register(output_writer.close)
@@ -1,48 +1,44 @@
-import re
+import io
 import os
-import spacy
 import logging
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
 from reportlab.pdfgen import canvas
+from data_extraction.output_writer import output_writer
+from data_extraction.similarity import link_items_to_paragraphs, format_match
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Load SpaCy model for NER
-nlp = spacy.load('en_core_web_sm')
-
-def map_relationships(text, images, tables):
+def map_relationships(text, images, tables, image_contexts=None, links=None):
     """
-    Map relationships between text, images, and tables using NLP.
+    Map relationships between text, images, and tables using TF-IDF similarity.
 
     Args:
         text (str): The extracted text from the document.
         images (list): List of image paths.
         tables (list): List of table paths.
+        image_contexts (dict): Optional mapping of image path to nearby document text.
+        links (dict): Precomputed result of link_items_to_paragraphs, if available.
 
     Returns:
-        dict: A dictionary mapping text to images and tables.
+        dict: A dictionary mapping each image and table to its closest paragraphs.
     """
     relationships = {
         "text_to_images": {},
         "text_to_tables": {}
     }
     try:
-        # Use spaCy to process the text
-        doc = nlp(text)
+        if links is None:
+            links = link_items_to_paragraphs(text, images, tables, image_contexts)
 
-        # Example references for images and tables
-        for image in images:
-            # Example: Match keywords like "Figure" or "Image" with some heuristic
-            if "figure" in text.lower() or "image" in text.lower():
-                relationships["text_to_images"][os.path.basename(image)] = "Mentioned in text"
+        for image, matches in links["images"].items():
+            relationships["text_to_images"][os.path.basename(image)] = matches
 
-        for table in tables:
-            # Example: Match keywords like "Table"
-            if "table" in text.lower():
-                relationships["text_to_tables"][os.path.basename(table)] = "Mentioned in text"
+        for table, matches in links["tables"].items():
+            relationships["text_to_tables"][os.path.basename(table)] = matches
 
-        logging.info(f"Mapped relationships: {relationships}")
+        logging.info(f"Mapped relationships for {len(links['images'])} image(s) and {len(links['tables'])} table(s)")
 
     except Exception as e:
         logging.error(f"Error mapping relationships: {e}")
@@ -67,12 +63,12 @@ def save_relationships_to_pdf(relationships, output_folder):
     # Save text-to-image relationships
     text_to_images_pdf = os.path.join(text_to_images_folder, "text_to_images.pdf")
     save_pdf(relationships["text_to_images"], text_to_images_pdf)
-    logging.info(f"Saved text-to-image relationships to {text_to_images_pdf}")
+    logging.info(f"Queued text-to-image relationships to {text_to_images_pdf}")
 
     # Save text-to-table relationships
     text_to_tables_pdf = os.path.join(text_to_tables_folder, "text_to_tables.pdf")
     save_pdf(relationships["text_to_tables"], text_to_tables_pdf)
-    logging.info(f"Saved text-to-table relationships to {text_to_tables_pdf}")
+    logging.info(f"Queued text-to-table relationships to {text_to_tables_pdf}")
 
 
 def save_pdf(content, pdf_path):
@@ -80,11 +76,13 @@ def save_pdf(content, pdf_path):
     Create a PDF document for the given content.
 
     Args:
-        content (dict): Dictionary to save in the PDF.
+        content (dict): Dictionary to save in the PDF. List values are drawn as
+            paragraph matches, one per line, wrapped to the page width.
         pdf_path (str): Path to save the PDF.
     """
     try:
-        c = canvas.Canvas(pdf_path, pagesize=letter)
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=letter)
         width, height = letter
 
         c.setFont("Helvetica-Bold", 14)
@@ -94,18 +92,28 @@ def save_pdf(content, pdf_path):
         c.setFont("Helvetica", 12)
 
         for key, value in content.items():
-            if y_position < 50:
-                c.showPage()
-                y_position = height - 50
-            c.drawString(50, y_position, f"{key}: {value}")
-            y_position -= 20
+            if isinstance(value, list):
+                lines = [(50, f"{key}:")]
+                lines += [(70, format_match(match)) for match in value] or [(70, "No related text found")]
+            else:
+                lines = [(50, f"{key}: {value}")]
+
+            for x_position, line in lines:
+                for wrapped_line in simpleSplit(line, "Helvetica", 12, width - x_position - 50):
+                    if y_position < 50:
+                        c.showPage()
+                        c.setFont("Helvetica", 12)
+                        y_position = height - 50
+                    c.drawString(x_position, y_position, wrapped_line)
+                    y_position -= 20
 
         c.save()
+        output_writer.write_bytes(pdf_path, buffer.getvalue())
     except Exception as e:
         logging.error(f"Error creating PDF: {e}")
 
 
-def map_and_save_relationships(text, images, tables, output_folder):
+def map_and_save_relationships(text, images, tables, output_folder, image_contexts=None, links=None):
     """
     Map relationships and save them to PDFs.
 
@@ -114,8 +122,10 @@ def map_and_save_relationships(text, images, tables, output_folder):
         images (list): List of extracted image paths.
         tables (list): List of extracted table paths.
         output_folder (str): Folder to save the PDFs.
+        image_contexts (dict): Optional mapping of image path to nearby document text.
+        links (dict): Precomputed result of link_items_to_paragraphs, if available.
     """
-    relationships = map_relationships(text, images, tables)
+    relationships = map_relationships(text, images, tables, image_contexts, links)
     save_relationships_to_pdf(relationships, output_folder)
 
 
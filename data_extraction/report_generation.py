@@ -1,7 +1,11 @@
+import io
 import os
 import logging
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
 from reportlab.pdfgen import canvas
+from data_extraction.output_writer import output_writer
+from data_extraction.similarity import link_items_to_paragraphs, format_match
 from transformers import T5Tokenizer, T5ForConditionalGeneration
 import pandas as pd
 from langdetect import detect
@@ -48,18 +52,20 @@ def generate_image_caption(image_path):
     caption = generate_summary(f"This is an image named {image_name}", task="generate caption")
     return caption
 
-def summarize_table(table_path):
+def summarize_table(table_path, df=None):
     """
     Summarize the contents of a table.
 
     Args:
         table_path (str): Path to the CSV table file.
+        df (pandas.DataFrame): Table contents, if already in memory; read from table_path otherwise.
 
     Returns:
         str: Generated summary of the table.
     """
     try:
-        df = pd.read_csv(table_path)
+        if df is None:
+            df = pd.read_csv(table_path)
         table_text = df.to_string(index=False)
         return generate_summary(table_text, task="summarize")
     except Exception as e:
@@ -72,10 +78,12 @@ def save_report_for_finding(output_path, findings):
 
     Args:
         output_path (str): Path to save the report.
-        findings (dict): Dictionary containing findings to save.
+        findings (dict): Dictionary containing findings to save. Long details are
+            wrapped to the page width.
     """
     try:
-        c = canvas.Canvas(output_path, pagesize=letter)
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=letter)
         width, height = letter
         c.setFont("Helvetica-Bold", 16)
         c.drawCentredString(width / 2, height - 50, "Findings Report")
@@ -86,21 +94,36 @@ def save_report_for_finding(output_path, findings):
         for finding_type, details in findings.items():
             if y_position < 100:
                 c.showPage()
+                c.setFont("Helvetica", 12)
                 y_position = height - 50
 
             c.drawString(50, y_position, f"{finding_type.capitalize()}:")
             y_position -= 20
 
             for detail in details:
-                c.drawString(70, y_position, detail)
-                y_position -= 20
+                for line in simpleSplit(detail, "Helvetica", 12, width - 70 - 50):
+                    if y_position < 50:
+                        c.showPage()
+                        c.setFont("Helvetica", 12)
+                        y_position = height - 50
+                    c.drawString(70, y_position, line)
+                    y_position -= 20
 
         c.save()
-        logging.info(f"Report saved to {output_path}")
+        output_writer.write_bytes(output_path, buffer.getvalue())
+        logging.info(f"Queued report to {output_path}")
     except Exception as e:
         logging.error(f"Error saving findings report: {e}")
 
-def generate_findings_report(text, images, tables, output_folder):
+def _related_text(matches):
+    """
+    Format paragraph matches as report lines.
+    """
+    if not matches:
+        return ["Related Text: None found"]
+    return [f"Related Text: {format_match(match)}" for match in matches]
+
+def generate_findings_report(text, images, tables, output_folder, image_contexts=None, links=None, table_frames=None):
     """
     Generate a findings report based on text, images, and tables.
 
@@ -109,6 +132,10 @@ def generate_findings_report(text, images, tables, output_folder):
         images (list): List of image paths.
         tables (list): List of table paths.
         output_folder (str): Folder to save the findings report.
+        image_contexts (dict): Optional mapping of image path to nearby document text.
+        links (dict): Precomputed result of link_items_to_paragraphs, if available.
+        table_frames (dict): Optional mapping of table path to its DataFrame; tables
+            missing from it are read from disk.
 
     Returns:
         None
@@ -118,16 +145,23 @@ def generate_findings_report(text, images, tables, output_folder):
         "tables": []
     }
 
-    # Generate captions for images
+    table_frames = table_frames or {}
+
+    # Find the paragraphs closest to each image and table
+    if links is None:
+        links = link_items_to_paragraphs(text, images, tables, image_contexts, table_frames)
+
+    # Generate captions for images and list their related text
     for image_path in images:
         caption = generate_image_caption(image_path)
         findings["images"].append(f"Image: {os.path.basename(image_path)}, Caption: {caption}")
+        findings["images"].extend(_related_text(links["images"].get(image_path, [])))
 
-    # Summarize tables and match with text
+    # Summarize tables and list their related text
     for table_path in tables:
-        table_summary = summarize_table(table_path)
-        if "table" in text.lower():
-            findings["tables"].append(f"Table: {os.path.basename(table_path)}, Summary: {table_summary}, Related Text: Found a matching text chunk mentioning a table.")
+        table_summary = summarize_table(table_path, table_frames.get(table_path))
+        findings["tables"].append(f"Table: {os.path.basename(table_path)}, Summary: {table_summary}")
+        findings["tables"].extend(_related_text(links["tables"].get(table_path, [])))
 
     # Save findings to a PDF report
     output_path = os.path.join(output_folder, "findings_report.pdf")
@@ -0,0 +1,165 @@
+import logging
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_TOP_K = 3
+# Number of item rows scored against all paragraphs per sparse matrix product
+BATCH_SIZE = 512
+# Characters of a matched paragraph kept for display in reports
+SNIPPET_LENGTH = 80
+
+
+def split_paragraphs(text):
+    """
+    Split text into paragraphs, numbered the same way as the saved paragraph files.
+
+    Args:
+        text (str): Extracted text from the document.
+
+    Returns:
+        list: (paragraph_number, paragraph_text) tuples for non-empty paragraphs.
+    """
+    return [(i + 1, paragraph) for i, paragraph in enumerate(text.split("\n\n")) if paragraph.strip()]
+
+
+def table_to_text(df):
+    """
+    Flatten a table into plain text for matching.
+
+    Args:
+        df (pandas.DataFrame): Table contents.
+
+    Returns:
+        str: Column names and cells joined by spaces.
+    """
+    df = df.fillna("").astype(str)
+    return " ".join(df.columns.astype(str).tolist() + df.to_numpy().ravel().tolist())
+
+
+def read_table_text(table_path):
+    """
+    Flatten a CSV table into plain text for matching.
+
+    Args:
+        table_path (str): Path to the CSV table file.
+
+    Returns:
+        str: Table cells joined by spaces, or an empty string on failure.
+    """
+    try:
+        return table_to_text(pd.read_csv(table_path, dtype=str, keep_default_na=False))
+    except Exception as e:
+        logging.error(f"Error reading table {table_path}: {e}")
+        return ""
+
+
+def top_k_matches(item_matrix, paragraph_matrix, top_k=DEFAULT_TOP_K, batch_size=BATCH_SIZE):
+    """
+    Find the most similar paragraphs for every item row.
+
+    Rows are L2-normalised TF-IDF vectors, so the sparse product gives cosine
+    similarity. Items are scored in batches to bound the size of the dense
+    score block.
+
+    Args:
+        item_matrix (scipy.sparse.csr_matrix): One row per item.
+        paragraph_matrix (scipy.sparse.csr_matrix): One row per paragraph.
+        top_k (int): Number of matches to keep per item.
+        batch_size (int): Number of items scored per matrix product.
+
+    Returns:
+        list: For each item, a list of (paragraph_row, score) sorted by descending score.
+    """
+    n_paragraphs = paragraph_matrix.shape[0]
+    k = min(top_k, n_paragraphs)
+    if k == 0:
+        return [[] for _ in range(item_matrix.shape[0])]
+
+    paragraph_t = paragraph_matrix.T.tocsr()
+    results = []
+    for start in range(0, item_matrix.shape[0], batch_size):
+        scores = (item_matrix[start:start + batch_size] @ paragraph_t).toarray()
+        if k < n_paragraphs:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(n_paragraphs), (scores.shape[0], 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for rows, row_scores in zip(top, top_scores):
+            results.append([(int(row), float(score)) for row, score in zip(rows, row_scores) if score > 0])
+    return results
+
+
+def link_items_to_paragraphs(text, images, tables, image_contexts=None, table_frames=None, top_k=DEFAULT_TOP_K):
+    """
+    Link images and tables to their most similar paragraphs using TF-IDF.
+
+    A single vocabulary is fitted over paragraphs, table contents and
+    image-adjacent text, so all scores are on the same scale.
+
+    Args:
+        text (str): Extracted text from the document.
+        images (list): List of image paths.
+        tables (list): List of table paths.
+        image_contexts (dict): Optional mapping of image path to nearby document text.
+        table_frames (dict): Optional mapping of table path to its DataFrame; tables
+            missing from it are read from disk.
+        top_k (int): Number of paragraphs to keep per image or table.
+
+    Returns:
+        dict: {"images": {path: matches}, "tables": {path: matches}} where each match is a
+        dict with the paragraph number, similarity score and a text snippet.
+    """
+    links = {
+        "images": {image: [] for image in images},
+        "tables": {table: [] for table in tables}
+    }
+    paragraphs = split_paragraphs(text)
+    if not paragraphs:
+        return links
+
+    image_contexts = image_contexts or {}
+    table_frames = table_frames or {}
+    items = [("images", image, image_contexts.get(image, "")) for image in images]
+    items += [
+        ("tables", table, table_to_text(table_frames[table]) if table in table_frames else read_table_text(table))
+        for table in tables
+    ]
+    items = [item for item in items if item[2].strip()]
+    if not items:
+        return links
+
+    try:
+        vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True, dtype=np.float32)
+        matrix = vectorizer.fit_transform([paragraph for _, paragraph in paragraphs] + [item[2] for item in items]).tocsr()
+    except ValueError as e:
+        # Raised when no terms remain, e.g. text consisting only of stop words
+        logging.warning(f"Could not build TF-IDF matrix: {e}")
+        return links
+
+    matches = top_k_matches(matrix[len(paragraphs):], matrix[:len(paragraphs)], top_k)
+    for (kind, path, _), item_matches in zip(items, matches):
+        links[kind][path] = [
+            {
+                "paragraph": paragraphs[row][0],
+                "score": score,
+                "snippet": " ".join(paragraphs[row][1].split())[:SNIPPET_LENGTH]
+            }
+            for row, score in item_matches
+        ]
+
+    logging.info(f"Linked {len(items)} item(s) against {len(paragraphs)} paragraph(s)")
+    return links
+
+
+def format_match(match):
+    """
+    Format a paragraph match as a single report line.
+    """
+    return f"Paragraph {match['paragraph']} (score {match['score']:.2f}): {match['snippet']}"
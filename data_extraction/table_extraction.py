@@ -4,6 +4,7 @@ import pandas as pd
 import re
 import logging
 from docx import Document
+from data_extraction.output_writer import output_writer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -136,16 +137,21 @@ class TableExtractor:
     def save_tables(self, type_, output_folder):
         """
         Save extracted tables to the specified output folder.
+        CSVs are rendered in memory and written atomically by the shared background writer.
+        Returns a dict mapping each table path to its DataFrame, or None if no tables were found.
         """
         tables = self.extract_relevant_tables(type_)
         if not tables:
             logging.warning(f"No tables found for type {type_}")
             return None
 
+        saved_tables = {}
         for idx, table in enumerate(tables):
             output_path = f"{output_folder}/table_{type_}_{idx + 1}.csv"
-            table.to_csv(output_path, index=False, encoding="utf-8-sig")
-            logging.info(f"Saved table to {output_path}")
+            output_writer.write_text(output_path, table.to_csv(index=False), encoding="utf-8-sig")
+            saved_tables[output_path] = table
+            logging.info(f"Queued table to {output_path}")
+        return saved_tables
 
 
 # Example Usage
@@ -6,6 +6,7 @@ import spacy
 import logging
 import os
 from concurrent.futures import ThreadPoolExecutor
+from data_extraction.output_writer import output_writer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -58,18 +59,15 @@ def perform_ner(text):
 def save_paragraphs_to_folder(text, output_folder):
     """
     Save each paragraph in the text to a separate file in the specified folder.
+    Files are written atomically by the shared background writer.
     """
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-
     paragraphs = text.split("\n\n")  # Split text into paragraphs
     for i, paragraph in enumerate(paragraphs):
         if paragraph.strip():  # Ensure paragraph is not empty
             paragraph_filename = f"paragraph_{i+1}.txt"
             paragraph_path = os.path.join(output_folder, paragraph_filename)
-            with open(paragraph_path, 'w', encoding='utf-8') as file:
-                file.write(paragraph)
-            logging.info(f"Saved paragraph {i+1} to {paragraph_path}")
+            output_writer.write_text(paragraph_path, paragraph, encoding='utf-8')
+            logging.info(f"Queued paragraph {i+1} to {paragraph_path}")
 
 def extract_text_from_file(file_path, output_folder):
     text = ""
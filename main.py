@@ -2,12 +2,15 @@ import argparse
 import os
 import logging
 from data_extraction.text_extraction import extract_text_from_file
-from data_extraction.image_extraction import extract_images_from_file
+from data_extraction.image_extraction import extract_images_from_file, extract_image_contexts
 from data_extraction.table_extraction import TableExtractor
 from data_extraction.relationship_mapping import map_and_save_relationships
 from data_extraction.report_generation import generate_findings_report
+from data_extraction.similarity import link_items_to_paragraphs
 from data_extraction.utils import ensure_output_folder
-from concurrent.futures import ThreadPoolExecutor
+from data_extraction.batch_scheduler import (
+    BatchScheduler, discover_files, DEFAULT_INCLUDE, DEFAULT_EXCLUDE, DEFAULT_TIMEOUT, DEFAULT_MEMORY_LIMIT
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -43,48 +46,59 @@ def process_file(input_path, output_folder):
     ensure_output_folder(tables_folder)
 
     table_extractor = TableExtractor(input_path)
-    table_extractor.save_tables("SOFP", tables_folder)  # Statement of Financial Position
-    table_extractor.save_tables("SOPL", tables_folder)  # Statement of Profit or Loss
-    table_extractor.save_tables("SOCF", tables_folder)  # Statement of Cash Flows
+    table_frames = {}
+    table_frames.update(table_extractor.save_tables("SOFP", tables_folder) or {})  # Statement of Financial Position
+    table_frames.update(table_extractor.save_tables("SOPL", tables_folder) or {})  # Statement of Profit or Loss
+    table_frames.update(table_extractor.save_tables("SOCF", tables_folder) or {})  # Statement of Cash Flows
+    tables = list(table_frames)
+
+    # Link images and tables to paragraphs, using the tables already in memory
+    logging.info("Linking images and tables to text...")
+    image_contexts = extract_image_contexts(input_path, images)
+    links = link_items_to_paragraphs(text_data["text"], images, tables, image_contexts, table_frames)
 
     # Map Relationships
     logging.info("Mapping relationships...")
     relationships_folder = os.path.join(output_folder, "relationships")
     ensure_output_folder(relationships_folder)
-    map_and_save_relationships(text_data["text"], images, [], relationships_folder)
+    map_and_save_relationships(text_data["text"], images, tables, relationships_folder, links=links)
 
     # Generate Findings Report
     logging.info("Generating findings report...")
     findings_folder = os.path.join(output_folder, "findings")
     ensure_output_folder(findings_folder)
-    generate_findings_report(text_data["text"], images, [], findings_folder)
+    generate_findings_report(text_data["text"], images, tables, findings_folder, links=links, table_frames=table_frames)
 
     logging.info(f"Processing completed for: {input_path}")
 
-def main(input_folder, output_folder):
+def main(input_folder, output_folder, include=None, exclude=None, timeout=DEFAULT_TIMEOUT,
+         memory_limit=DEFAULT_MEMORY_LIMIT, max_workers=None, resume=True):
     ensure_output_folder(output_folder)
-    input_files = [f for f in os.listdir(input_folder) if os.path.isfile(os.path.join(input_folder, f))]
+    jobs = discover_files(input_folder, include, exclude, output_folder=output_folder)
 
-    if not input_files:
+    if not jobs:
         logging.warning("No files found in the input folder. Exiting.")
         return
 
-    with ThreadPoolExecutor() as executor:
-        futures = [
-            executor.submit(
-                process_file,
-                os.path.join(input_folder, file_name),
-                os.path.join(output_folder, os.path.splitext(file_name)[0])
-            )
-            for file_name in input_files
-        ]
-        for future in futures:
-            future.result()
+    scheduler = BatchScheduler(process_file, timeout=timeout, memory_limit=memory_limit,
+                               max_workers=max_workers, resume=resume)
+    results = scheduler.run(jobs, output_folder)
+
+    failed = [rel_path for rel_path, status in results.items() if status != "done"]
+    if failed:
+        logging.warning(f"{len(failed)} file(s) did not complete: {failed}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Data Extraction and Relationship Mapping Application')
     parser.add_argument('--input', default=DEFAULT_INPUT_FOLDER, help='Input folder location (path to the folder containing documents)')
     parser.add_argument('--output', default=DEFAULT_OUTPUT_FOLDER, help='Output folder location (path to save outputs)')
+    parser.add_argument('--include', action='append', help=f'Glob pattern of files to process; may be repeated (default: {DEFAULT_INCLUDE})')
+    parser.add_argument('--exclude', action='append', help=f'Glob pattern of files or folders to skip, in addition to {DEFAULT_EXCLUDE}; may be repeated')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Maximum seconds allowed per file')
+    parser.add_argument('--max-memory', type=int, default=DEFAULT_MEMORY_LIMIT // 1024 ** 2, help='Maximum memory in MB allowed per file')
+    parser.add_argument('--workers', type=int, default=None, help='Maximum number of files processed at once (default: CPU count, limited by available RAM)')
+    parser.add_argument('--no-resume', action='store_true', help='Reprocess files already completed by a previous run')
     args = parser.parse_args()
 
-    main(args.input, args.output)
+    main(args.input, args.output, include=args.include, exclude=args.exclude, timeout=args.timeout,
+         memory_limit=args.max_memory * 1024 ** 2, max_workers=args.workers, resume=not args.no_resume)